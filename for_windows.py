@@ -1,18 +1,74 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import base64
+from dataclasses import dataclass
 from datetime import datetime, timezone
+import functools
+import itertools
 import json
+import locale
 import os
+import re
+import shutil
 import socket
-import subprocess
 import sys
-import threading
+import time
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
 
-_jobs: Dict[str, Dict[str, Any]] = {}
-_jobs_lock = threading.Lock()
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    try:
+        return text.encode("utf-8")
+    except UnicodeEncodeError:  # lone surrogates; fall back to \u escapes
+        return json.dumps(obj, separators=(",", ":")).encode("ascii")
+
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@dataclass
+class Job:
+    job_id: str
+    command_count: int
+    started_at: str
+    # Only for elapsed-time math; the ISO timestamps are formatted once.
+    start_monotonic: float
+    status: str = "running"
+    finished_at: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+
+# Jobs are only created, updated and read on the event loop thread, so the
+# table needs no lock. Insertion-ordered, so the oldest jobs come first when
+# evicting.
+_jobs: Dict[str, Job] = {}
+_MAX_JOBS = int(os.environ.get("PS_MAX_JOBS", "256"))
+# Strong references to running job tasks; the event loop only keeps weak ones.
+_job_tasks: Set["asyncio.Task[None]"] = set()
+
+# Per-request/response log lines are only written when PS_DEBUG=1.
+_DEBUG = os.environ.get("PS_DEBUG") == "1"
+
+_SOCKET_BUFFER_BYTES = 256 * 1024
+# Per-stream, per-command cap on captured PowerShell output.
+_MAX_OUTPUT_BYTES = int(os.environ.get("PS_MAX_OUTPUT_BYTES", str(8 * 1024 * 1024)))
+
+# Upper bound for a single request line; asyncio's default 64 KiB is too small
+# for large scripts sent via "command"/"commands".
+_MAX_LINE_BYTES = 16 * 1024 * 1024
 
 
 def _log(message: str) -> None:
@@ -27,72 +83,417 @@ def _preview_command(command: str, limit: int = 160) -> str:
     return one_line[: limit - 3] + "..."
 
 
-def _write_line(sock: socket.socket, obj: Dict[str, Any]) -> None:
-    data = json.dumps(obj, ensure_ascii=True).encode("utf-8") + b"\n"
-    sock.sendall(data)
+async def _write_message(writer: asyncio.StreamWriter, obj: Dict[str, Any], framing: str) -> None:
+    payload = _dumps(obj)
+    if framing == "content-length":
+        writer.write(f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii") + payload)
+    else:
+        writer.write(payload + b"\n")
+    await writer.drain()
 
 
-def _read_line(sock_file) -> Dict[str, Any]:
-    line = sock_file.readline()
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[bytes, str]:
+    line = await reader.readline()
     if not line:
         raise ConnectionError("client disconnected")
-    return json.loads(line)
+
+    if line.startswith(b"Content-Length:"):
+        value = line.split(b":", 1)[1].strip()
+        length = int(value) if value.isdigit() else -1
+        if length < 0 or length > _MAX_LINE_BYTES:
+            # Same cap as a JSONL line; the read loop logs and drops the client.
+            raise ValueError(f"invalid Content-Length: {value[:32]!r}")
+        # Consume remaining headers until blank line
+        while True:
+            hdr = await reader.readline()
+            if not hdr:
+                raise ConnectionError("client disconnected")
+            if hdr in (b"\n", b"\r\n"):
+                break
+        return await reader.readexactly(length), "content-length"
+
+    return line, "jsonl"
+
+
+# A status poll exactly as the bridge sends it (the most frequent message while
+# jobs run), matched on the raw bytes so it can skip JSON decoding.
+_STATUS_REQUEST_RE = re.compile(
+    rb'\s*\{\s*"action"\s*:\s*"status"\s*,\s*"job_id"\s*:\s*"([0-9a-f-]{36})"\s*\}\s*'
+)
+
+
+def _fast_status_lookup(raw: bytes) -> Optional[str]:
+    match = _STATUS_REQUEST_RE.fullmatch(raw)
+    if match is None:
+        return None
+    return match.group(1).decode("ascii")
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _run_single_powershell(command: str) -> Dict[str, Any]:
-    _log(f"run command: {_preview_command(command)}")
-    pwsh = os.environ.get("POWERSHELL_EXE")
+def _decode_output(data: Optional[bytes], encoding: Optional[str] = None) -> str:
+    # Mirror subprocess text mode: locale encoding plus universal newlines.
+    if not data:
+        return ""
+    text = data.decode(encoding or locale.getpreferredencoding(False), errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _combine_output(results: List[Dict[str, Any]], key: str) -> str:
+    # One join over all fragments instead of formatting, joining and
+    # appending copies of every command's (possibly large) output.
+    parts: List[str] = []
+    for item in results:
+        text = item.get(key, "")
+        if not text:
+            continue
+        if parts:
+            parts.append("\n\n")
+        parts.append(f"[command {int(item.get('index', 0))} {key}]\n")
+        parts.append(text.rstrip())
+    if parts:
+        parts.append("\n")
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_pwsh() -> Optional[str]:
     candidates = []
+    pwsh = os.environ.get("POWERSHELL_EXE")
     if pwsh:
         candidates.append(pwsh)
     candidates.extend(["pwsh", "powershell.exe"])
-    try:
-        last_err = None
-        for exe in candidates:
+    for exe in candidates:
+        path = shutil.which(exe)
+        if path:
+            return path
+    return None
+
+
+# Loaded once into every persistent host. Each command arrives as a single
+# stdin line calling __PsMcpRun with the base64 (UTF-8) script and a unique
+# marker; the marker is echoed on both streams once the command has finished.
+_HOST_BOOTSTRAP = r"""
+[Console]::OutputEncoding = [Text.Encoding]::UTF8
+function global:__PsMcpRun([string]$Source, [string]$Marker) {
+    $global:LASTEXITCODE = 0
+    $code = 0
+    Push-Location
+    try {
+        $text = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($Source))
+        & ([scriptblock]::Create($text)) | Out-Default
+        if (-not $?) { $code = 1 }
+        if ($global:LASTEXITCODE) { $code = $global:LASTEXITCODE }
+    } catch {
+        [Console]::Error.WriteLine(($_ | Out-String))
+        $code = 1
+    } finally {
+        Pop-Location
+    }
+    [Console]::Out.Write("`n<<<$Marker`:$code>>>`n")
+    [Console]::Error.Write("`n<<<$Marker>>>`n")
+}
+"""
+
+
+def _host_line(script: str) -> bytes:
+    encoded = base64.b64encode(script.encode("utf-8")).decode("ascii")
+    return (
+        ". ([scriptblock]::Create([Text.Encoding]::UTF8.GetString("
+        f"[Convert]::FromBase64String('{encoded}'))))\n"
+    ).encode("ascii")
+
+
+class HostUnavailable(Exception):
+    """Raised when a persistent host cannot accept a command."""
+
+
+class _CappedOutput:
+    """Collects one stream's output, keeping at most _MAX_OUTPUT_BYTES.
+
+    Bytes past the cap are counted and dropped (the stream is still drained
+    so PowerShell never blocks on a full pipe).
+    """
+
+    def __init__(self) -> None:
+        self._data = bytearray()
+        self._dropped = 0
+
+    def append(self, data: Any) -> None:
+        room = _MAX_OUTPUT_BYTES - len(self._data)
+        if room >= len(data):
+            self._data += data
+            return
+        if room > 0:
+            self._data += data[:room]
+        self._dropped += len(data) - max(room, 0)
+
+    def getvalue(self) -> bytes:
+        if self._dropped:
+            self._data += f"\n...[truncated {self._dropped} bytes]...\n".encode("ascii")
+            self._dropped = 0
+        return bytes(self._data)
+
+
+async def _read_capped(stream: asyncio.StreamReader) -> bytes:
+    output = _CappedOutput()
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            return output.getvalue()
+        output.append(chunk)
+
+
+class _MarkerReader:
+    """Splits a host output stream on ``\\n<<<marker...>>>\\n`` trailers.
+
+    Bytes past a trailer stay buffered for the next command in a batch.
+    """
+
+    def __init__(self, stream: asyncio.StreamReader) -> None:
+        self._stream = stream
+        self._buf = bytearray()
+
+    def _spill(self, output: _CappedOutput, upto: int) -> None:
+        if upto <= 0:
+            return
+        with memoryview(self._buf) as view:
+            output.append(view[:upto])
+        del self._buf[:upto]
+
+    async def read_until(self, marker: bytes) -> Tuple[bytes, Optional[bytes]]:
+        """Return the output before the trailer and the trailer's payload.
+
+        The payload is ``None`` if the stream hit EOF before the trailer.
+        Output is moved out of the scan buffer as it arrives, so only a
+        marker's worth of bytes is ever re-scanned.
+        """
+        prefix = b"\n<<<" + marker
+        buf = self._buf
+        output = _CappedOutput()
+        while True:
+            idx = buf.find(prefix)
+            if idx >= 0:
+                self._spill(output, idx)
+                end = buf.find(b">>>\n", len(prefix))
+                if end >= 0:
+                    payload = bytes(buf[len(prefix) : end])
+                    del buf[: end + 4]
+                    return output.getvalue(), payload
+            else:
+                self._spill(output, len(buf) - len(prefix) + 1)
+            chunk = await self._stream.read(65536)
+            if not chunk:
+                self._spill(output, len(buf))
+                return output.getvalue(), None
+            buf += chunk
+
+
+def _abandon(task: "asyncio.Future[Any]") -> None:
+    # Cancel a write nobody will wait for, and retrieve its error (e.g. a
+    # broken pipe from an exited host) so asyncio does not log it.
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+class PwshHost:
+    """A long-lived PowerShell process that runs commands fed over stdin."""
+
+    def __init__(self, proc: asyncio.subprocess.Process) -> None:
+        assert proc.stdout is not None and proc.stderr is not None
+        self._proc = proc
+        self._stdout = _MarkerReader(proc.stdout)
+        self._stderr = _MarkerReader(proc.stderr)
+
+    @classmethod
+    async def spawn(cls, pwsh: str) -> "PwshHost":
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                pwsh,
+                "-NoProfile",
+                "-NoLogo",
+                "-NonInteractive",
+                "-Command",
+                "-",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as exc:
+            raise HostUnavailable(str(exc)) from exc
+        host = cls(proc)
+        try:
+            await host._send(_host_line(_HOST_BOOTSTRAP))
+        except HostUnavailable:
+            host.close()
+            raise
+        return host
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.returncode is None
+
+    async def _send(self, data: bytes) -> None:
+        stdin = self._proc.stdin
+        assert stdin is not None
+        try:
+            stdin.write(data)
+            await stdin.drain()
+        except (ConnectionError, OSError) as exc:
+            raise HostUnavailable(str(exc)) from exc
+
+    async def run_batch(self, commands: List[str]) -> List[Tuple[str, str, int]]:
+        """Run *commands* in order with a single write to the host.
+
+        Stops early if a command ends the host (e.g. ``exit 3``); the caller
+        is expected to resubmit the remaining commands.
+        """
+        markers = [uuid.uuid4().hex for _ in commands]
+        lines = []
+        for command, marker in zip(commands, markers):
+            encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+            lines.append(f"__PsMcpRun '{encoded}' '{marker}'\n")
+
+        # pwsh reads its script a line at a time, so the batch is written while
+        # output is read: waiting for the whole write first deadlocks once an
+        # early command fills the stdout pipe and the rest does not fit stdin.
+        sender = asyncio.ensure_future(self._send("".join(lines).encode("ascii")))
+        try:
+            outputs = await self._read_outputs(markers)
+        except BaseException:
+            _abandon(sender)
+            raise
+        if len(outputs) < len(markers):
+            # The host exited mid-batch; lines it never read are moot.
+            _abandon(sender)
+        else:
+            await sender
+        return outputs
+
+    async def _read_outputs(self, markers: List[str]) -> List[Tuple[str, str, int]]:
+        outputs: List[Tuple[str, str, int]] = []
+        for marker in markers:
+            (out, out_trailer), (err, _err_trailer) = await asyncio.gather(
+                self._stdout.read_until(marker.encode("ascii")),
+                self._stderr.read_until(marker.encode("ascii")),
+            )
+            if out_trailer is None:
+                # The command ended the host; report like a one-shot process would.
+                code = await self._proc.wait()
+                outputs.append((_decode_output(out, "utf-8"), _decode_output(err, "utf-8"), code))
+                break
             try:
-                proc = subprocess.run(
-                    [exe, "-NoProfile", "-NonInteractive", "-Command", command],
-                    capture_output=True,
-                    text=True,
-                )
-                _log(
-                    f"command finished: code={proc.returncode}, stdout={len(proc.stdout or '')} bytes, stderr={len(proc.stderr or '')} bytes"
-                )
-                return {
-                    "ok": proc.returncode == 0,
-                    "stdout": proc.stdout or "",
-                    "stderr": proc.stderr or "",
-                    "code": proc.returncode,
-                }
-            except FileNotFoundError as exc:
-                last_err = exc
-                continue
-        return {
-            "ok": False,
-            "stdout": "",
-            "stderr": "No PowerShell executable found (tried pwsh, powershell.exe).",
-            "code": 127,
-        }
-    except Exception as exc:
-        return {
-            "ok": False,
-            "stdout": "",
-            "stderr": f"PowerShell execution failed: {exc}",
-            "code": 1,
-        }
+                code = int(out_trailer.lstrip(b":"))
+            except ValueError:
+                code = 1
+            outputs.append((_decode_output(out, "utf-8"), _decode_output(err, "utf-8"), code))
+        return outputs
+
+    def close(self) -> None:
+        if self.alive:
+            try:
+                self._proc.kill()
+            except ProcessLookupError:
+                pass
+
+
+class PwshPool:
+    """Idle persistent hosts, reused across commands and clients."""
 
+    def __init__(self, max_idle: int) -> None:
+        self._max_idle = max_idle
+        self._idle: List[PwshHost] = []
 
-def _run_powershell_batch(commands: List[str]) -> Dict[str, Any]:
+    async def run_batch(self, pwsh: str, commands: List[str]) -> List[Tuple[str, str, int]]:
+        host = None
+        while self._idle:
+            candidate = self._idle.pop()
+            if candidate.alive:
+                host = candidate
+                break
+        if host is None:
+            host = await PwshHost.spawn(pwsh)
+
+        try:
+            outputs = await host.run_batch(commands)
+        except BaseException:
+            host.close()
+            raise
+
+        if host.alive and len(self._idle) < self._max_idle:
+            self._idle.append(host)
+        else:
+            host.close()
+        return outputs
+
+
+# 0 disables persistent hosts: every command gets its own PowerShell process.
+_HOST_POOL_SIZE = int(os.environ.get("PS_HOST_POOL_SIZE", "4"))
+_pool = PwshPool(max_idle=_HOST_POOL_SIZE)
+
+
+async def _spawn_powershell(pwsh: str, command: str) -> Tuple[str, str, int]:
+    proc = await asyncio.create_subprocess_exec(
+        pwsh,
+        "-NoProfile",
+        "-NonInteractive",
+        "-Command",
+        command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    assert proc.stdout is not None and proc.stderr is not None
+    out, err = await asyncio.gather(_read_capped(proc.stdout), _read_capped(proc.stderr))
+    return _decode_output(out), _decode_output(err), await proc.wait()
+
+
+async def _run_commands(pwsh: str, commands: List[str]) -> List[Tuple[str, str, int]]:
+    outputs: List[Tuple[str, str, int]] = []
+    if _HOST_POOL_SIZE <= 0:
+        for command in commands:
+            outputs.append(await _spawn_powershell(pwsh, command))
+        return outputs
+    while len(outputs) < len(commands):
+        remaining = commands[len(outputs) :]
+        try:
+            outputs.extend(await _pool.run_batch(pwsh, remaining))
+        except HostUnavailable as exc:
+            _log(f"persistent host unavailable ({exc}); falling back to one-shot processes")
+            for command in remaining:
+                outputs.append(await _spawn_powershell(pwsh, command))
+    return outputs
+
+
+async def _run_powershell_batch(commands: List[str]) -> Dict[str, Any]:
     _log(f"batch start: {len(commands)} command(s)")
+    for command in commands:
+        _log(f"run command: {_preview_command(command)}")
+
+    pwsh = _resolve_pwsh()
+    if pwsh is None:
+        outputs = [("", "No PowerShell executable found (tried pwsh, powershell.exe).", 127)] * len(commands)
+    else:
+        try:
+            outputs = await _run_commands(pwsh, commands)
+        except Exception as exc:
+            outputs = [("", f"PowerShell execution failed: {exc}", 1)] * len(commands)
+
     results: List[Dict[str, Any]] = []
-    for idx, command in enumerate(commands):
-        result = _run_single_powershell(command)
-        result["index"] = idx
-        results.append(result)
+    for idx, (stdout, stderr, item_code) in enumerate(outputs):
+        _log(f"command finished: code={item_code}, stdout={len(stdout)} bytes, stderr={len(stderr)} bytes")
+        results.append(
+            {
+                "ok": item_code == 0,
+                "stdout": stdout,
+                "stderr": stderr,
+                "code": item_code,
+                "index": idx,
+            }
+        )
 
     ok = all(bool(item.get("ok")) for item in results)
     code = 0
@@ -112,21 +513,10 @@ def _run_powershell_batch(commands: List[str]) -> Dict[str, Any]:
             "results": results,
         }
 
-    stdout_parts: List[str] = []
-    stderr_parts: List[str] = []
-    for item in results:
-        idx = int(item.get("index", 0))
-        out = item.get("stdout", "")
-        err = item.get("stderr", "")
-        if out:
-            stdout_parts.append(f"[command {idx} stdout]\n{out.rstrip()}")
-        if err:
-            stderr_parts.append(f"[command {idx} stderr]\n{err.rstrip()}")
-
     return {
         "ok": ok,
-        "stdout": "\n\n".join(stdout_parts) + ("\n" if stdout_parts else ""),
-        "stderr": "\n\n".join(stderr_parts) + ("\n" if stderr_parts else ""),
+        "stdout": _combine_output(results, "stdout"),
+        "stderr": _combine_output(results, "stderr"),
         "code": code,
         "results": results,
     }
@@ -150,74 +540,92 @@ def _extract_commands(msg: Dict[str, Any]) -> Optional[List[str]]:
     return None
 
 
-def _status_from_job(job: Dict[str, Any]) -> Dict[str, Any]:
-    status = str(job.get("status", "running"))
-    started_at = str(job.get("started_at", ""))
-    finished_at = job.get("finished_at")
-
+def _status_from_job(job: Job) -> Dict[str, Any]:
     response = {
-        "ok": status != "failed",
-        "status": status,
-        "job_id": job["job_id"],
-        "started_at": started_at,
-        "finished_at": finished_at,
-        "command_count": int(job.get("command_count", 0)),
+        "ok": job.status != "failed",
+        "status": job.status,
+        "job_id": job.job_id,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "command_count": job.command_count,
     }
 
-    if status == "running":
-        elapsed_seconds = max(0.0, datetime.now(timezone.utc).timestamp() - float(job.get("start_ts", 0.0)))
-        response["elapsed_seconds"] = elapsed_seconds
+    if job.status == "running":
+        response["elapsed_seconds"] = time.monotonic() - job.start_monotonic
         return response
 
-    response["result"] = job.get("result") or {}
+    response["result"] = job.result or {}
     return response
 
 
-def _run_job(job_id: str, commands: List[str]) -> None:
-    _log(f"job {job_id} started ({len(commands)} command(s))")
-    result = _run_powershell_batch(commands)
-    finished_at = _now_iso()
-    status = "completed" if bool(result.get("ok")) else "failed"
-    with _jobs_lock:
-        if job_id in _jobs:
-            _jobs[job_id]["status"] = status
-            _jobs[job_id]["finished_at"] = finished_at
-            _jobs[job_id]["result"] = result
-    _log(f"job {job_id} finished with status={status}")
+async def _run_job(job: Job, commands: List[str]) -> None:
+    _log(f"job {job.job_id} started ({len(commands)} command(s))")
+    result = await _run_powershell_batch(commands)
+    job.finished_at = _now_iso()
+    job.status = "completed" if bool(result.get("ok")) else "failed"
+    job.result = result
+    _log(f"job {job.job_id} finished with status={job.status}")
+
+
+def _evict_finished_jobs() -> None:
+    # Running jobs are never evicted, so the table may exceed _MAX_JOBS while
+    # that many jobs are still in flight.
+    excess = len(_jobs) - _MAX_JOBS
+    if excess <= 0:
+        return
+    finished = (job_id for job_id, job in _jobs.items() if job.status != "running")
+    for job_id in list(itertools.islice(finished, excess)):
+        del _jobs[job_id]
+        _log(f"job {job_id} evicted from history")
 
 
 def _start_async_job(commands: List[str]) -> Dict[str, Any]:
-    job_id = str(uuid.uuid4())
-    started_at = _now_iso()
-    job = {
-        "job_id": job_id,
-        "status": "running",
-        "started_at": started_at,
-        "start_ts": datetime.now(timezone.utc).timestamp(),
-        "finished_at": None,
-        "command_count": len(commands),
-        "result": None,
-    }
-    with _jobs_lock:
-        _jobs[job_id] = job
+    job = Job(
+        job_id=str(uuid.uuid4()),
+        command_count=len(commands),
+        started_at=_now_iso(),
+        start_monotonic=time.monotonic(),
+    )
+    _jobs[job.job_id] = job
+    _evict_finished_jobs()
 
-    thread = threading.Thread(target=_run_job, args=(job_id, commands), daemon=True)
-    thread.start()
-    _log(f"job {job_id} queued ({len(commands)} command(s))")
+    task = asyncio.get_running_loop().create_task(_run_job(job, commands))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    _log(f"job {job.job_id} queued ({len(commands)} command(s))")
 
     return {
         "ok": True,
         "status": "running",
-        "job_id": job_id,
-        "started_at": started_at,
+        "job_id": job.job_id,
+        "started_at": job.started_at,
         "finished_at": None,
         "command_count": len(commands),
     }
 
 
-def _handle_request(msg: Dict[str, Any]) -> Dict[str, Any]:
+def _job_status(job_id: str) -> Dict[str, Any]:
+    job = _jobs.get(job_id)
+    if job is None:
+        _log(f"status check: job {job_id} not found")
+        return {
+            "ok": False,
+            "status": "not_found",
+            "stderr": f"Unknown job_id '{job_id}'",
+            "code": 3,
+        }
+    response = _status_from_job(job)
+    _log(f"status check: job {job_id} -> {response.get('status')}")
+    return response
+
+
+async def _handle_request(msg: Dict[str, Any]) -> Dict[str, Any]:
     action = msg.get("action")
-    _log(f"request received: action={action or 'run(default)'} keys={sorted(msg.keys())}")
+    if _DEBUG:
+        _log(f"request received: action={action or 'run(default)'} keys={list(msg)}")
+
+    if action == "ping":
+        return {"ok": True, "status": "pong"}
 
     if action == "status":
         job_id = msg.get("job_id")
@@ -228,19 +636,7 @@ def _handle_request(msg: Dict[str, Any]) -> Dict[str, Any]:
                 "stderr": "Missing or invalid 'job_id'",
                 "code": 2,
             }
-        with _jobs_lock:
-            job = _jobs.get(job_id)
-            if job is None:
-                _log(f"status check: job {job_id} not found")
-                return {
-                    "ok": False,
-                    "status": "not_found",
-                    "stderr": f"Unknown job_id '{job_id}'",
-                    "code": 3,
-                }
-            response = _status_from_job(job)
-            _log(f"status check: job {job_id} -> {response.get('status')}")
-            return response
+        return _job_status(job_id)
 
     commands = _extract_commands(msg)
     if commands is None:
@@ -256,7 +652,7 @@ def _handle_request(msg: Dict[str, Any]) -> Dict[str, Any]:
     if async_mode:
         return _start_async_job(commands)
 
-    result = _run_powershell_batch(commands)
+    result = await _run_powershell_batch(commands)
     _log(f"sync run finished: status={'completed' if bool(result.get('ok')) else 'failed'}")
     return {
         **result,
@@ -265,38 +661,152 @@ def _handle_request(msg: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _handle_client(conn: socket.socket, idle_timeout_seconds: float) -> None:
+@dataclass
+class _Client:
+    writer: asyncio.StreamWriter
+    # None while a request is being handled; idle time only counts between requests.
+    idle_since: Optional[float]
+    timed_out: bool = False
+
+
+class ClientRegistry:
+    """Connected clients, swept periodically for idle timeouts.
+
+    A single sweep replaces a timeout timer armed around every pending read.
+    """
+
+    def __init__(self, idle_timeout_seconds: float) -> None:
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._clients: Dict[asyncio.StreamWriter, _Client] = {}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def add(self, writer: asyncio.StreamWriter) -> _Client:
+        client = _Client(writer=writer, idle_since=time.monotonic())
+        self._clients[writer] = client
+        return client
+
+    def remove(self, writer: asyncio.StreamWriter) -> None:
+        self._clients.pop(writer, None)
+
+    async def reap_idle(self) -> None:
+        interval = min(1.0, self.idle_timeout_seconds)
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for client in list(self._clients.values()):
+                if client.idle_since is None or now - client.idle_since < self.idle_timeout_seconds:
+                    continue
+                _log(f"client idle timeout after {int(self.idle_timeout_seconds)}s; closing connection")
+                client.timed_out = True
+                client.writer.close()
+
+
+def _tune_client_socket(sock: Any) -> None:
+    # Small request/response messages should not wait on Nagle, larger outputs
+    # should not stall on window fills, and keepalive catches dead peers.
     try:
-        peer = conn.getpeername()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_BYTES)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_BYTES)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    except OSError as exc:
+        _log(f"could not tune client socket: {exc}")
+
+
+async def _handle_client(reader: asyncio.StreamReader, client: _Client) -> None:
+    writer = client.writer
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        _tune_client_socket(sock)
+    peer = writer.get_extra_info("peername")
+    if peer:
         _log(f"client connected: {peer[0]}:{peer[1]}")
-    except Exception:
+    else:
         _log("client connected: <unknown-peer>")
 
-    conn.settimeout(idle_timeout_seconds)
-    with conn:
-        conn_file = conn.makefile("r", encoding="utf-8", newline="")
+    try:
         while True:
+            # Replies use the same framing as the request.
             try:
-                msg = _read_line(conn_file)
-            except socket.timeout:
-                _log(f"client idle timeout after {int(idle_timeout_seconds)}s; closing connection")
-                break
-            except ConnectionError:
-                _log("client disconnected")
-                break
-            except json.JSONDecodeError as exc:
-                _log(f"invalid JSON from client: {exc}")
+                body, framing = await _read_frame(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not client.timed_out:
+                    _log("client disconnected")
                 break
             except Exception as exc:
-                if "timed out" in str(exc).lower():
-                    _log(f"client idle timeout after {int(idle_timeout_seconds)}s; closing connection")
-                    break
                 _log(f"client read error: {exc}")
                 break
 
-            result = _handle_request(msg)
-            _write_line(conn, result)
-            _log(f"response sent: ok={result.get('ok')} status={result.get('status')}")
+            client.idle_since = None
+            job_id = _fast_status_lookup(body)
+            if job_id is not None:
+                result = _job_status(job_id)
+            else:
+                try:
+                    msg = _loads(body)
+                except ValueError as exc:
+                    # JSONDecodeError, or UnicodeDecodeError for non-UTF-8 bytes.
+                    _log(f"invalid JSON from client: {exc}")
+                    break
+                if isinstance(msg, dict):
+                    result = await _handle_request(msg)
+                else:
+                    result = {
+                        "ok": False,
+                        "status": "invalid",
+                        "stderr": "Request must be a JSON object",
+                        "code": 2,
+                    }
+            try:
+                await _write_message(writer, result, framing)
+            except ConnectionError:
+                _log("client disconnected")
+                break
+            if _DEBUG:
+                _log(f"response sent: ok={result.get('ok')} status={result.get('status')}")
+            client.idle_since = time.monotonic()
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def _serve(host: str, port: int, idle_timeout_seconds: float, max_clients: int) -> None:
+    clients = ClientRegistry(idle_timeout_seconds)
+
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if len(clients) >= max_clients:
+            _log(f"rejecting client: {max_clients} client(s) already connected")
+            writer.close()
+            return
+        client = clients.add(writer)
+        try:
+            await _handle_client(reader, client)
+        finally:
+            clients.remove(writer)
+
+    server = await asyncio.start_server(
+        handler,
+        host,
+        port,
+        reuse_address=True,
+        backlog=max_clients,
+        limit=_MAX_LINE_BYTES,
+    )
+
+    sys.stderr.write(f"PowerShell listener on {host}:{port}\n")
+    sys.stderr.flush()
+
+    reaper = asyncio.get_running_loop().create_task(clients.reap_idle())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        reaper.cancel()
 
 
 def main() -> None:
@@ -320,24 +830,22 @@ def main() -> None:
         default=float(os.environ.get("PS_CLIENT_IDLE_TIMEOUT", "300")),
         help="Seconds before an idle client connection is closed (default: 300).",
     )
+    parser.add_argument(
+        "--max-clients",
+        type=int,
+        default=int(os.environ.get("PS_MAX_CLIENTS", "64")),
+        help="Maximum concurrent client connections; extra ones are closed (default: 64).",
+    )
     args = parser.parse_args()
 
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    sock.bind((args.host, args.port))
-    sock.listen(16)
-
-    sys.stderr.write(f"PowerShell listener on {args.host}:{args.port}\n")
-    sys.stderr.flush()
+    pwsh = _resolve_pwsh()
+    if pwsh is None:
+        _log("No PowerShell executable found (tried POWERSHELL_EXE, pwsh, powershell.exe).")
+        sys.exit(1)
+    _log(f"using PowerShell executable: {pwsh}")
 
-    while True:
-        conn, _addr = sock.accept()
-        thread = threading.Thread(
-            target=_handle_client,
-            args=(conn, args.client_idle_timeout),
-            daemon=True,
-        )
-        thread.start()
+    # Subprocess support on Windows needs the Proactor loop (the default since 3.8).
+    asyncio.run(_serve(args.host, args.port, args.client_idle_timeout, args.max_clients))
 
 
 if __name__ == "__main__":
@@ -1,77 +1,393 @@
 #!/usr/bin/env python3
 import argparse
+from dataclasses import dataclass, field
+import errno
+import functools
 import json
+import os
+import re
+import select
 import socket
-import sys
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
 
-def _write_message(message: Dict[str, Any], framing: str) -> None:
-    payload = json.dumps(message, ensure_ascii=True).encode("utf-8")
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    try:
+        return text.encode("utf-8")
+    except UnicodeEncodeError:  # lone surrogates; fall back to \u escapes
+        return json.dumps(obj, separators=(",", ":")).encode("ascii")
+
+
+def _loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+# Replies are written straight to the stdout descriptor: nothing else in the
+# bridge prints, so Python's buffered stdout only added a copy and a flush.
+_STDOUT_FD = 1
+
+
+def _write_payload(payload: bytes, framing: str) -> None:
     if framing == "content-length":
-        header = f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii")
-        sys.stdout.buffer.write(header + payload)
-        sys.stdout.buffer.flush()
+        buffers = [f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii"), payload]
     else:
-        sys.stdout.write(payload.decode("utf-8") + "\n")
-        sys.stdout.flush()
+        buffers = [payload, b"\n"]
+    if not hasattr(os, "writev"):
+        data = memoryview(b"".join(buffers))
+        while data:
+            data = data[os.write(_STDOUT_FD, data):]
+        return
+    # Hand header and payload to the kernel together rather than copying a
+    # multi-megabyte payload just to prepend a few header bytes.
+    views = [memoryview(b) for b in buffers]
+    while views:
+        sent = os.writev(_STDOUT_FD, views)
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if views and sent:
+            views[0] = views[0][sent:]
+
+
+# Response envelopes have a fixed shape; only the id and the variable fields
+# are serialized per reply and spliced between these pieces.
+_RESP_PREFIX = b'{"jsonrpc":"2.0","id":'
+_RESP_RESULT = b',"result":'
+_RESP_ERROR_CODE = b',"error":{"code":'
+_RESP_ERROR_MESSAGE = b',"message":'
+_RESP_TEXT_OPEN = b',"result":{"content":[{"type":"text","text":'
+_RESP_TEXT_CLOSE_OK = b'}],"isError":false}}'
+_RESP_TEXT_CLOSE_ERROR = b'}],"isError":true}}'
+
+
+def _result_payload(msg_id: Any, result: bytes) -> bytes:
+    # Splice a pre-serialized result into a JSON-RPC response envelope.
+    return b"".join((_RESP_PREFIX, _dumps(msg_id), _RESP_RESULT, result, b"}"))
 
 
 def _error_response(msg_id: Any, code: int, message: str, framing: str) -> None:
     if msg_id is None:
         return
-    _write_message(
-        {
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "error": {"code": code, "message": message},
-        },
-        framing,
+    payload = b"".join(
+        (_RESP_PREFIX, _dumps(msg_id), _RESP_ERROR_CODE, b"%d" % code, _RESP_ERROR_MESSAGE, _dumps(message), b"}}")
     )
+    _write_payload(payload, framing)
 
 
 def _text_result(msg_id: Any, text: str, is_error: bool = False, framing: str = "jsonl") -> None:
     if msg_id is None:
         return
-    _write_message(
-        {
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "result": {
-                "content": [{"type": "text", "text": text}],
-                "isError": is_error,
-            },
-        },
-        framing,
-    )
+    close = _RESP_TEXT_CLOSE_ERROR if is_error else _RESP_TEXT_CLOSE_OK
+    _write_payload(b"".join((_RESP_PREFIX, _dumps(msg_id), _RESP_TEXT_OPEN, _dumps(text), close)), framing)
 
 
-def _connect(host: str, port: int) -> socket.socket:
-    while True:
+_RECV_BYTES = 65536
+
+
+@dataclass
+class Conn:
+    """Connection to the Windows listener and its receive buffer.
+
+    Bytes received past the end of one reply stay in ``buf`` for the next.
+    """
+
+    sock: socket.socket
+    # Newline-delimited requests, for listeners without Content-Length support.
+    jsonl: bool = False
+    buf: bytearray = field(init=False, default_factory=bytearray)
+    # Fixed scratch space for recv_into(), reused for every read.
+    scratch: bytearray = field(init=False, default_factory=lambda: bytearray(_RECV_BYTES))
+    # Last time a reply was received; a fresh connection counts as healthy.
+    last_ok: float = field(init=False, default_factory=time.monotonic)
+    replied: bool = field(init=False, default=False)
+
+    def close(self) -> None:
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2.0)
-            sock.connect((host, port))
-            sock.settimeout(None)
-            return sock
+            self.sock.close()
+        except Exception:
+            pass
+
+
+_SOCKET_BUFFER_BYTES = 1024 * 1024
+# Idle connections are checked with a ping before carrying a real request.
+_PING_INTERVAL_SECONDS = 30.0
+_TCP_USER_TIMEOUT_MS = 30000
+# Linux keepalive probing: first probe after 60s idle, then every 15s, 4 tries.
+_KEEPALIVE_OPTIONS = (("TCP_KEEPIDLE", 60), ("TCP_KEEPINTVL", 15), ("TCP_KEEPCNT", 4))
+
+
+def _size_buffers(sock: socket.socket) -> None:
+    # Larger buffers keep big PowerShell outputs from stalling on window
+    # fills. Sized before connecting so the window scale offered in the
+    # handshake can cover them.
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_BYTES)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_BYTES)
+
+
+def _quickack(sock: socket.socket) -> None:
+    # Linux: ACK replies immediately rather than delaying. The kernel drops
+    # back to delayed ACKs on its own, so this is re-armed per request. It is
+    # only a hint: kernels that reject it (e.g. WSL1) must not fail a request.
+    if hasattr(socket, "TCP_QUICKACK"):
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
         except OSError:
-            try:
+            pass
+
+
+def _tune_socket(sock: socket.socket) -> None:
+    # Nagle plus delayed ACKs can add ~40ms to every small request/response.
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    _quickack(sock)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for name, value in _KEEPALIVE_OPTIONS:
+        if hasattr(socket, name):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+    if hasattr(socket, "TCP_USER_TIMEOUT"):
+        # Linux: fail fast when sent data stays unacknowledged (dead peer).
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT, _TCP_USER_TIMEOUT_MS)
+
+
+_CONNECT_IN_PROGRESS = {
+    0,
+    errno.EINPROGRESS,
+    errno.EWOULDBLOCK,
+    errno.EALREADY,
+    getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve(host: str, port: int) -> Tuple[Tuple[Any, ...], ...]:
+    # Reconnects reuse the first resolution; _connect drops it only when no
+    # cached address accepts a connection.
+    return tuple(dict.fromkeys(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)))
+
+
+def _connect_first(host: str, port: int, timeout: float) -> Optional[socket.socket]:
+    """Connect to every address *host* resolves to at once; keep the first.
+
+    A host such as ``localhost`` may resolve to addresses the listener is not
+    bound on; racing them costs the fastest connect instead of the sum of the
+    failed attempts.
+    """
+    try:
+        infos = _resolve(host, port)
+    except OSError:
+        return None
+
+    pending: List[socket.socket] = []
+    for family, sock_type, proto, _canonname, address in infos:
+        try:
+            sock = socket.socket(family, sock_type, proto)
+        except OSError:
+            continue
+        try:
+            _size_buffers(sock)
+        except OSError:
+            pass
+        sock.setblocking(False)
+        if sock.connect_ex(address) in _CONNECT_IN_PROGRESS:
+            pending.append(sock)
+        else:
+            sock.close()
+
+    winner: Optional[socket.socket] = None
+    deadline = time.monotonic() + timeout
+    while pending and winner is None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        _readable, writable, _errored = select.select([], pending, [], remaining)
+        for sock in writable:
+            pending.remove(sock)
+            if winner is None and sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                winner = sock
+            else:
                 sock.close()
-            except Exception:
-                pass
-        time.sleep(1.0)
+
+    for sock in pending:
+        sock.close()
+    if winner is not None:
+        winner.setblocking(True)
+    return winner
+
+
+def _connect(host: str, port: int, jsonl: bool = False) -> Conn:
+    while True:
+        sock = _connect_first(host, port, timeout=2.0)
+        if sock is None:
+            _resolve.cache_clear()
+            time.sleep(1.0)
+            continue
+        try:
+            _tune_socket(sock)
+        except OSError:
+            pass
+        return Conn(sock, jsonl)
+
+
+def _recv_more(conn: Conn) -> int:
+    n = conn.sock.recv_into(conn.scratch)
+    if not n:
+        raise ConnectionError("Windows listener disconnected")
+    with memoryview(conn.scratch) as view:
+        conn.buf += view[:n]
+    return n
+
+
+def _recv_available(conn: Conn) -> int:
+    """Buffer whatever the listener has already sent, without blocking.
+
+    Returns the number of bytes read, or raises ConnectionError if the
+    listener has closed its end.
+    """
+    readable, _writable, _errored = select.select([conn.sock], [], [], 0)
+    if not readable:
+        return 0
+    return _recv_more(conn)
 
 
-def _send_request(sock: socket.socket, payload: Dict[str, Any]) -> Dict[str, Any]:
-    encoded = json.dumps(payload, ensure_ascii=True) + "\n"
-    sock.sendall(encoded.encode("utf-8"))
+def _read_frame(conn: Conn) -> Dict[str, Any]:
+    buf = conn.buf
+    scan = 0
+    while True:
+        header_end = buf.find(b"\r\n\r\n", scan)
+        if header_end >= 0:
+            break
+        # Resume after the bytes already searched; keep 3 in case the
+        # terminator straddles the next chunk.
+        scan = max(0, len(buf) - 3)
+        _recv_more(conn)
+
+    length = None
+    for header in bytes(buf[:header_end]).split(b"\r\n"):
+        name, _, value = header.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value.strip())
+    if length is None:
+        raise ConnectionError("Windows listener sent a reply without Content-Length")
+
+    body_start = header_end + 4
+    body_end = body_start + length
+    while len(buf) < body_end:
+        _recv_more(conn)
+    body = buf[body_start:body_end]
+    del buf[:body_end]
+    return _loads(body)
+
+
+def _read_line(conn: Conn) -> Dict[str, Any]:
+    buf = conn.buf
+    scan = 0
+    while True:
+        end = buf.find(b"\n", scan)
+        if end >= 0:
+            break
+        scan = len(buf)
+        _recv_more(conn)
+    line = buf[:end]
+    del buf[: end + 1]
+    return _loads(line)
+
+
+def _send_all(sock: socket.socket, buffers: List[bytes]) -> None:
+    """Send *buffers* back to back without concatenating them first.
+
+    sendmsg() hands all buffers to the kernel in one call (scatter/gather);
+    platforms without it fall back to a joined sendall().
+    """
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(buffers))
+        return
+    views = [memoryview(buf) for buf in buffers if buf]
+    while views:
+        sent = sock.sendmsg(views)
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if sent:
+            views[0] = views[0][sent:]
+
+
+class FramingRejected(ConnectionError):
+    """The listener closed a fresh connection without replying to a framed request.
+
+    Listeners that predate Content-Length framing fail to parse the header
+    and drop the connection, so the request never ran.
+    """
+
+
+def _send_request(conn: Conn, payload: bytes) -> Dict[str, Any]:
+    if conn.jsonl:
+        _send_all(conn.sock, [payload, b"\n"])
+    else:
+        _send_all(conn.sock, [f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii"), payload])
+    _quickack(conn.sock)
+    try:
+        result = _read_line(conn) if conn.jsonl else _read_frame(conn)
+    except ConnectionError as exc:
+        if not conn.jsonl and not conn.replied and not conn.buf:
+            raise FramingRejected(str(exc)) from exc
+        raise
+    conn.last_ok = time.monotonic()
+    conn.replied = True
+    return result
+
+
+_PING_REQUEST = _dumps({"action": "ping"})
 
-    with sock.makefile("r", encoding="utf-8", newline="") as reader:
-        line = reader.readline()
-        if not line:
-            raise ConnectionError("Windows listener disconnected")
-        return json.loads(line)
+
+def _is_alive(conn: Conn) -> bool:
+    try:
+        # A listener that dropped the connection (idle reaping, restart) has
+        # left an EOF behind; spot it without a ping round trip.
+        _recv_available(conn)
+    except OSError:
+        return False
+    if time.monotonic() - conn.last_ok < _PING_INTERVAL_SECONDS:
+        return True
+    try:
+        _send_request(conn, _PING_REQUEST)
+    except OSError:
+        return False
+    return True
+
+
+def _request(
+    conn: Optional[Conn], host: str, port: int, payload: bytes
+) -> Tuple[Conn, Dict[str, Any]]:
+    """Send the encoded request *payload*, (re)connecting as needed; returns the connection used."""
+    if conn is None:
+        conn = _connect(host, port)
+    elif not _is_alive(conn):
+        # Found stale by a cheap check, before the real request was sent.
+        conn.close()
+        conn = _connect(host, port)
+
+    try:
+        return conn, _send_request(conn, payload)
+    except OSError as exc:
+        # ConnectionError, BrokenPipeError and TimeoutError are all OSErrors.
+        conn.close()
+        # Every listener reads JSONL, so retry with it when the framing was
+        # rejected (or was already in use). The fallback lasts only as long
+        # as the connection; fresh connections try Content-Length again.
+        conn = _connect(host, port, conn.jsonl or isinstance(exc, FramingRejected))
+        return conn, _send_request(conn, payload)
 
 
 def _extract_commands(arguments: Dict[str, Any]) -> Optional[List[str]]:
@@ -92,6 +408,27 @@ def _extract_commands(arguments: Dict[str, Any]) -> Optional[List[str]]:
     return None
 
 
+# Printable ASCII other than '"' and '\\' needs no JSON escaping.
+_PLAIN_JSON_TEXT_RE = re.compile(rb'[ !#-\[\]-~]*')
+
+
+def _encode_run_request(commands: List[str], async_mode: bool) -> bytes:
+    if len(commands) == 1 and commands[0].isascii():
+        # Typical one-liners need no escaping; copy them into the request
+        # as-is instead of running the JSON encoder over them.
+        raw = commands[0].encode("ascii")
+        if _PLAIN_JSON_TEXT_RE.fullmatch(raw):
+            flag = b"true" if async_mode else b"false"
+            return b'{"action":"run","async":' + flag + b',"command":"' + raw + b'"}'
+
+    payload: Dict[str, Any] = {"action": "run", "async": async_mode}
+    if len(commands) == 1:
+        payload["command"] = commands[0]
+    else:
+        payload["commands"] = commands
+    return _dumps(payload)
+
+
 def _format_execution_text(result: Dict[str, Any]) -> str:
     status = str(result.get("status", "unknown"))
     command_count = result.get("command_count")
@@ -105,7 +442,8 @@ def _format_execution_text(result: Dict[str, Any]) -> str:
     if stdout:
         sections.append(stdout)
     if stderr:
-        sections.append("[stderr]\n" + stderr)
+        sections.append("[stderr]")
+        sections.append(stderr)
     if len(sections) == 1:
         sections.append("(no output)")
     return "\n".join(sections)
@@ -129,100 +467,263 @@ def _format_status_text(result: Dict[str, Any]) -> str:
     if isinstance(inner, dict):
         lines.append(_format_execution_text(inner))
     elif result.get("stderr"):
-        lines.append("[stderr]\n" + str(result.get("stderr")))
+        lines.append("[stderr]")
+        lines.append(str(result.get("stderr")))
 
     return "\n".join(lines)
 
 
-def _handle_tools_list(msg_id: Any, framing: str) -> None:
-    _write_message(
-        {
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "result": {
-                "tools": [
-                    {
-                        "name": "powershell",
-                        "description": "Run one or more Windows PowerShell commands via network bridge.",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "command": {
-                                    "type": "string",
-                                    "description": "Single PowerShell command to execute.",
-                                },
-                                "commands": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "minItems": 1,
-                                    "description": "List of PowerShell commands to run in order.",
-                                },
-                                "async": {
-                                    "type": "boolean",
-                                    "description": "If true, return immediately with job_id for status polling.",
-                                }
-                            },
-                            "additionalProperties": False,
+# The initialize and tools/list results never change; serialize them once.
+_INITIALIZE_RESULT = _dumps(
+    {
+        "protocolVersion": "2024-11-05",
+        "serverInfo": {
+            "name": "linux-mcp-powershell-bridge",
+            "version": "0.1.0",
+        },
+        "capabilities": {"tools": {}},
+    }
+)
+
+_TOOLS_LIST_RESULT = _dumps(
+    {
+        "tools": [
+            {
+                "name": "powershell",
+                "description": "Run one or more Windows PowerShell commands via network bridge.",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "command": {
+                            "type": "string",
+                            "description": "Single PowerShell command to execute.",
                         },
-                    },
-                    {
-                        "name": "powershell_status",
-                        "description": "Get status/output for a long-running PowerShell job.",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "job_id": {
-                                    "type": "string",
-                                    "description": "Job ID returned by async powershell call.",
-                                }
-                            },
-                            "required": ["job_id"],
-                            "additionalProperties": False,
+                        "commands": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "minItems": 1,
+                            "description": "List of PowerShell commands to run in order.",
                         },
+                        "async": {
+                            "type": "boolean",
+                            "description": "If true, return immediately with job_id for status polling.",
+                        }
                     },
-                ]
+                    "additionalProperties": False,
+                },
             },
-        },
-        framing,
+            {
+                "name": "powershell_status",
+                "description": "Get status/output for a long-running PowerShell job.",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "job_id": {
+                            "type": "string",
+                            "description": "Job ID returned by async powershell call.",
+                        }
+                    },
+                    "required": ["job_id"],
+                    "additionalProperties": False,
+                },
+            },
+        ]
+    }
+)
+
+
+@dataclass
+class Session:
+    """Listener address and the connection to it, opened on first use."""
+
+    host: str
+    port: int
+    conn: Optional[Conn] = None
+
+    def request(self, payload: bytes) -> Dict[str, Any]:
+        self.conn, result = _request(self.conn, self.host, self.port, payload)
+        return result
+
+
+def _handle_initialize(msg: Dict[str, Any], framing: str, session: Session) -> None:
+    _write_payload(_result_payload(msg.get("id"), _INITIALIZE_RESULT), framing)
+
+
+def _handle_tools_list(msg: Dict[str, Any], framing: str, session: Session) -> None:
+    _write_payload(_result_payload(msg.get("id"), _TOOLS_LIST_RESULT), framing)
+
+
+def _handle_notification(msg: Dict[str, Any], framing: str, session: Session) -> None:
+    # Notifications expect no response.
+    pass
+
+
+def _call_powershell(msg_id: Any, arguments: Dict[str, Any], framing: str, session: Session) -> None:
+    commands = _extract_commands(arguments)
+    if commands is None:
+        _error_response(
+            msg_id,
+            -32602,
+            "Provide 'command' string or non-empty 'commands' array of strings",
+            framing,
+        )
+        return
+
+    async_mode = bool(arguments.get("async", False))
+    result = session.request(_encode_run_request(commands, async_mode))
+
+    if async_mode:
+        status = str(result.get("status", "unknown"))
+        job_id = result.get("job_id") or "(unknown)"
+        text = f"status: {status}\njob_id: {job_id}"
+    else:
+        text = _format_execution_text(result)
+    _text_result(msg_id, text, is_error=not bool(result.get("ok")), framing=framing)
+
+
+# Status polls repeat for as long as a job runs; only the job id varies.
+_STATUS_REQUEST_OPEN = b'{"action":"status","job_id":'
+
+
+def _call_powershell_status(msg_id: Any, arguments: Dict[str, Any], framing: str, session: Session) -> None:
+    job_id = arguments.get("job_id")
+    if not isinstance(job_id, str) or not job_id:
+        _error_response(msg_id, -32602, "Missing or invalid 'job_id'", framing)
+        return
+
+    result = session.request(_STATUS_REQUEST_OPEN + _dumps(job_id) + b"}")
+
+    _text_result(
+        msg_id,
+        _format_status_text(result),
+        is_error=not bool(result.get("ok")),
+        framing=framing,
     )
 
 
-def _read_message() -> Tuple[Optional[Dict[str, Any]], str]:
-    buf = sys.stdin.buffer
-    line = buf.readline()
-    if not line:
-        return None, "jsonl"
+_TOOLS: Dict[str, Callable[[Any, Dict[str, Any], str, Session], None]] = {
+    "powershell": _call_powershell,
+    "powershell_status": _call_powershell_status,
+}
+
+
+def _handle_tools_call(msg: Dict[str, Any], framing: str, session: Session) -> None:
+    params = msg.get("params") or {}
+    name = params.get("name")
+    tool = _TOOLS.get(name) if isinstance(name, str) else None
+    if tool is None:
+        _error_response(msg.get("id"), -32601, "Tool not found", framing)
+        return
+    tool(msg.get("id"), params.get("arguments") or {}, framing, session)
+
+
+_HANDLERS: Dict[str, Callable[[Dict[str, Any], str, Session], None]] = {
+    "initialize": _handle_initialize,
+    "tools/list": _handle_tools_list,
+    "tools/call": _handle_tools_call,
+    "initialized": _handle_notification,
+}
+
+
+def _content_length(line: Union[bytes, bytearray]) -> Optional[int]:
+    # Scan the digits in place instead of split()/strip() copies of the line.
+    i = line.find(b":") + 1
+    end = len(line)
+    while i < end and line[i] in b" \t":
+        i += 1
+    length = 0
+    j = i
+    while j < end and 0x30 <= line[j] <= 0x39:
+        length = length * 10 + line[j] - 0x30
+        j += 1
+    if j == i:
+        return None
+    while j < end and line[j] in b" \t\r\n":
+        j += 1
+    return length if j == end else None
+
+
+class _StdinReader:
+    """Frame MCP messages out of stdin, reading it in large chunks.
+
+    A single read usually carries a whole message (often several), so headers
+    and body are peeled off one buffer instead of costing a read per line.
+    """
+
+    def __init__(self, fd: int = 0, chunk_size: int = 65536) -> None:
+        self.fd = fd
+        self.chunk_size = chunk_size
+        self.buf = bytearray()
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = os.read(self.fd, self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def next_message(self) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Return the next (message, framing); message is None if undecodable.
+
+        At end of input the message is None and ``eof`` is set.
+        """
+        buf = self.buf
+        scan = 0
+        while True:
+            nl = buf.find(b"\n", scan)
+            if nl >= 0:
+                break
+            scan = len(buf)
+            if not self._fill():
+                return None, "jsonl"
+
+        if not buf.startswith(b"Content-Length:"):
+            line = buf[:nl].strip()
+            del buf[: nl + 1]
+            if not line:
+                return None, "jsonl"
+            try:
+                return _loads(line), "jsonl"
+            except json.JSONDecodeError:
+                return None, "jsonl"
 
-    if line.startswith(b"Content-Length:"):
         framing = "content-length"
-        try:
-            length = int(line.split(b":", 1)[1].strip())
-        except ValueError:
+        length = _content_length(buf[: nl + 1])
+        if length is None:
+            del buf[: nl + 1]
             return None, framing
 
-        # Consume remaining headers until blank line
+        # Skip any remaining headers up to the blank line.
+        pos = scan = nl + 1
         while True:
-            hdr = buf.readline()
-            if not hdr or hdr in (b"\n", b"\r\n"):
+            nl = buf.find(b"\n", scan)
+            if nl < 0:
+                scan = len(buf)
+                if not self._fill():
+                    return None, framing
+                continue
+            blank = nl == pos or (nl == pos + 1 and buf[pos] == 0x0D)
+            pos = scan = nl + 1
+            if blank:
                 break
 
-        body = buf.read(length)
-        if not body:
-            return None, framing
+        end = pos + length
+        while len(buf) < end:
+            if not self._fill():
+                return None, framing
         try:
-            return json.loads(body.decode("utf-8")), framing
+            with memoryview(buf) as view:
+                body = view[pos:end]
+                try:
+                    return _loads(body), framing
+                finally:
+                    body.release()
         except json.JSONDecodeError:
             return None, framing
-
-    # JSONL framing
-    framing = "jsonl"
-    line = line.strip()
-    if not line:
-        return None, framing
-    try:
-        return json.loads(line.decode("utf-8")), framing
-    except json.JSONDecodeError:
-        return None, framing
+        finally:
+            del buf[:end]
 
 
 def main() -> None:
@@ -242,132 +743,28 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    host = args.host
-    port = args.port
-
-    sock: Optional[socket.socket] = None
-
-    framing_mode = "jsonl"
+    session = Session(args.host, args.port)
+    reader = _StdinReader()
+    # Loop-invariant lookups bound once as locals.
+    next_message = reader.next_message
+    find_handler = _HANDLERS.get
+    error_response = _error_response
 
     while True:
-        msg, framing = _read_message()
+        msg, framing = next_message()
         if msg is None:
-            if sys.stdin.buffer.closed:
+            if reader.eof:
                 break
             continue
 
-        framing_mode = framing
-
-        msg_id = msg.get("id")
         method = msg.get("method")
-
-        if method == "initialize":
-            _write_message(
-                {
-                    "jsonrpc": "2.0",
-                    "id": msg_id,
-                    "result": {
-                        "protocolVersion": "2024-11-05",
-                        "serverInfo": {
-                            "name": "linux-mcp-powershell-bridge",
-                            "version": "0.1.0",
-                        },
-                        "capabilities": {"tools": {}},
-                    },
-                },
-                framing_mode,
-            )
-            continue
-
-        if method == "tools/list":
-            _handle_tools_list(msg_id, framing_mode)
-            continue
-
-        if method == "initialized":
-            # Notification; no response expected.
-            continue
-
-        if method == "tools/call":
-            params = msg.get("params") or {}
-            name = params.get("name")
-            arguments = params.get("arguments") or {}
-
-            if name == "powershell":
-                commands = _extract_commands(arguments)
-                if commands is None:
-                    _error_response(
-                        msg_id,
-                        -32602,
-                        "Provide 'command' string or non-empty 'commands' array of strings",
-                        framing_mode,
-                    )
-                    continue
-
-                async_mode = bool(arguments.get("async", False))
-                payload: Dict[str, Any] = {"action": "run", "async": async_mode}
-                if len(commands) == 1:
-                    payload["command"] = commands[0]
-                else:
-                    payload["commands"] = commands
-
-                if sock is None:
-                    sock = _connect(host, port)
-
-                try:
-                    result = _send_request(sock, payload)
-                except Exception:
-                    try:
-                        sock.close()
-                    except Exception:
-                        pass
-                    sock = _connect(host, port)
-                    result = _send_request(sock, payload)
-
-                if async_mode:
-                    status = str(result.get("status", "unknown"))
-                    job_id = result.get("job_id") or "(unknown)"
-                    text = f"status: {status}\njob_id: {job_id}"
-                else:
-                    text = _format_execution_text(result)
-                _text_result(msg_id, text, is_error=not bool(result.get("ok")), framing=framing_mode)
-                continue
-
-            if name == "powershell_status":
-                job_id = arguments.get("job_id")
-                if not isinstance(job_id, str) or not job_id:
-                    _error_response(msg_id, -32602, "Missing or invalid 'job_id'", framing_mode)
-                    continue
-
-                payload = {"action": "status", "job_id": job_id}
-                if sock is None:
-                    sock = _connect(host, port)
-
-                try:
-                    result = _send_request(sock, payload)
-                except Exception:
-                    try:
-                        sock.close()
-                    except Exception:
-                        pass
-                    sock = _connect(host, port)
-                    result = _send_request(sock, payload)
-
-                _text_result(
-                    msg_id,
-                    _format_status_text(result),
-                    is_error=not bool(result.get("ok")),
-                    framing=framing_mode,
-                )
-                continue
-
-            _error_response(msg_id, -32601, "Tool not found", framing_mode)
-            continue
-
-        if method is None:
-            _error_response(msg_id, -32600, "Invalid Request", framing_mode)
-            continue
-
-        _error_response(msg_id, -32601, "Method not found", framing_mode)
+        handler = find_handler(method) if isinstance(method, str) else None
+        if handler is not None:
+            handler(msg, framing, session)
+        elif method is None:
+            error_response(msg.get("id"), -32600, "Invalid Request", framing)
+        else:
+            error_response(msg.get("id"), -32601, "Method not found", framing)
 
 
 if __name__ == "__main__":